@@ -1,3 +1,7 @@
+from collections import deque
+
+from graph_utils import intern,visited_set
+
 graph = {
     'A': ['B', 'C','G'],
     'B': ['A', 'D', 'E'],
@@ -8,15 +12,44 @@ graph = {
     'G': []
 }
 
-def bfs(graph,start):
-    visited = set([start])
-    queue  = [start]
+def bfs(graph,start,ids=None):
+    visited = visited_set(ids)
+    visited.add(start)
+    queue  = deque([start])
     while queue:
-        node = queue.pop(0)
+        node = queue.popleft()
         print(node,end = ' ')
         for i in graph[node]:
             if i not in visited:
                 visited.add(i)
                 queue.append(i)
 
-bfs(graph,"A")
\ No newline at end of file
+def bfs_levels(graph,start,target=None,max_depth=None):
+    dist = {start:0}
+    parent = {start:None}
+    frontier = [start]
+    depth = 0
+    while frontier and start != target:
+        if max_depth is not None and depth >= max_depth:
+            break
+        depth += 1
+        next_frontier = []
+        for node in frontier:
+            for i in graph[node]:
+                if i not in dist:
+                    dist[i] = depth
+                    parent[i] = node
+                    next_frontier.append(i)
+        if target in dist:
+            break
+        frontier = next_frontier
+    return dist,parent
+
+ids = intern(graph)
+bfs(graph,"A",ids)
+print('')
+dist,parent = bfs_levels(graph,'A')
+print(dist)
+print(parent)
+print(bfs_levels(graph,'A',target='E')[0])
+print(bfs_levels(graph,'A',max_depth=1)[0])
\ No newline at end of file
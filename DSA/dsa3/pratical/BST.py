@@ -1,4 +1,9 @@
+import os
+import tempfile
+import threading
+from collections import Counter
 
+from binary_format import TREE_HEADER,TYPECODES,open_view,read_values,value_typecode,write_values
 
 
 class Node:
@@ -6,10 +11,15 @@ class Node:
         self.data = data
         self.left = None
         self.right = None
+        self.height = 1
+        self.size = 1
 
 class BST:
-    def __init__(self):
+    def __init__(self,balanced=False):
         self.root = None
+        self.balanced = balanced
+        self.rotations = 0
+        self.rebalances = 0
     
     def insert(self,data):
         new_node = Node(data)
@@ -18,20 +28,239 @@ class BST:
             return
         
         current  =  self.root
+        path = []
 
         while True:
+            path.append(current)
             if current.data  < data :
                 if not current.left:
                     current.left = new_node
-                    return
+                    break
                 else:
                     current = current.left
             else:
                 if not current.right:
                     current.right = new_node
-                    return
+                    break
                 else:
                     current = current.right
+        self.root = self._retrace(path)
+
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    @classmethod
+    def from_sorted(cls,keys,balanced=False):
+        keys = list(keys)
+        for i in range(1,len(keys)):
+            if keys[i] < keys[i-1]:
+                print('keys are not sorted')
+                return None
+        tree = cls(balanced)
+
+        def build(lo,hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = Node(keys[mid])
+            node.left = build(mid + 1,hi)
+            node.right = build(lo,mid)
+            tree._update(node)
+            return node
+
+        tree.root = build(0,len(keys))
+        return tree
+
+    def _join(self,small,node,big):
+        small_height,big_height = self._height(small),self._height(big)
+        if abs(small_height - big_height) <= 1:
+            node.left,node.right = big,small
+            self._update(node)
+            return node
+        path = []
+        if big_height > small_height:
+            current = big
+            while self._height(current) > small_height + 1:
+                path.append(current)
+                current = current.right
+            node.left,node.right = current,small
+            self._update(node)
+            path[-1].right = node
+        else:
+            current = small
+            while self._height(current) > big_height + 1:
+                path.append(current)
+                current = current.left
+            node.left,node.right = big,current
+            self._update(node)
+            path[-1].left = node
+        return self._retrace(path)
+
+    @classmethod
+    def join(cls,left,right):
+        if left.root and right.root:
+            largest = left.root
+            while largest.left:
+                largest = largest.left
+            smallest = right.root
+            while smallest.right:
+                smallest = smallest.right
+            if largest.data > smallest.data:
+                print('keys of left must not exceed keys of right')
+                return None
+        tree = cls(left.balanced or right.balanced)
+        if not right.root:
+            tree.root = left.root
+        else:
+            path = []
+            pivot = right.root
+            while pivot.right:
+                path.append(pivot)
+                pivot = pivot.right
+            if path:
+                path[-1].right = pivot.left
+                big = tree._retrace(path)
+            else:
+                big = pivot.left
+            tree.root = tree._join(left.root,pivot,big)
+        left.root = right.root = None
+        return tree
+
+    def split(self,key):
+        path = []
+        node = self.root
+        while node:
+            path.append(node)
+            node = node.left if node.data < key else node.right
+        small = big = None
+        for node in reversed(path):
+            if node.data < key:
+                small = self._join(node.right,node,small)
+            else:
+                big = self._join(big,node,node.left)
+        self.root = None
+        smaller,rest = BST(self.balanced),BST(self.balanced)
+        smaller.root,rest.root = small,big
+        return smaller,rest
+
+    def dump(self,path):
+        keys = []
+        shape = bytearray()
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            keys.append(node.data)
+            shape.append((1 if node.left else 0) | (2 if node.right else 0))
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+        typecode = value_typecode(keys)
+        if typecode is None:
+            print('keys must be Python literals to be dumped')
+            return False
+        with open(path,'wb') as f:
+            f.write(TREE_HEADER.pack(b'BST1',typecode.encode(),self.balanced,len(keys)))
+            write_values(f,keys,typecode)
+            f.write(shape)
+        return True
+
+    @classmethod
+    def load(cls,path):
+        view = open_view(path)
+        magic,typecode,balanced,n = TREE_HEADER.unpack_from(view)
+        if magic != b'BST1':
+            print('not a BST file')
+            return None
+        if typecode not in TYPECODES.encode():
+            print('unknown key encoding')
+            return None
+        keys,start = read_values(view,TREE_HEADER.size,n,typecode.decode())
+        shape = view[start:start + n]
+        tree = cls(bool(balanced))
+        nodes = []
+        stack = []
+        for i in range(n):
+            node = Node(keys[i])
+            nodes.append(node)
+            if stack:
+                parent,flags = stack[-1]
+                if flags & 1 and parent.left is None:
+                    parent.left = node
+                else:
+                    parent.right = node
+            stack.append((node,shape[i]))
+            while stack:
+                parent,flags = stack[-1]
+                if (flags & 1 and parent.left is None) or (flags & 2 and parent.right is None):
+                    break
+                stack.pop()
+        for node in reversed(nodes):
+            tree._update(node)
+        tree.root = nodes[0] if nodes else None
+        return tree
+
+    def _height(self,node):
+        return node.height if node else 0
+
+    def _size(self,node):
+        return node.size if node else 0
+
+    def _update(self,node):
+        node.height = 1 + max(self._height(node.left),self._height(node.right))
+        node.size = 1 + self._size(node.left) + self._size(node.right)
+
+    def _rotate_left(self,node):
+        child = node.right
+        node.right = child.left
+        child.left = node
+        self._update(node)
+        self._update(child)
+        self.rotations += 1
+        return child
+
+    def _rotate_right(self,node):
+        child = node.left
+        node.left = child.right
+        child.right = node
+        self._update(node)
+        self._update(child)
+        self.rotations += 1
+        return child
+
+    def _balance(self,node):
+        self._update(node)
+        balance = self._height(node.left) - self._height(node.right)
+        if balance > 1:
+            if self._height(node.left.left) < self._height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            node = self._rotate_right(node)
+            self.rebalances += 1
+        elif balance < -1:
+            if self._height(node.right.right) < self._height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            node = self._rotate_left(node)
+            self.rebalances += 1
+        return node
+
+    def _replace_child(self,parent,old,new):
+        if parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def _retrace(self,path):
+        root = None
+        for i in range(len(path)-1,-1,-1):
+            node = path[i]
+            if self.balanced:
+                root = self._balance(node)
+            else:
+                self._update(node)
+                root = node
+            if i and root is not node:
+                self._replace_child(path[i-1],node,root)
+        return root
     
     def search(self,data):
         
@@ -63,6 +292,76 @@ class BST:
             self.postorder(node.right)
             print(node.data,end=' ')
 
+    def iter_inorder(self,node):
+        stack = []
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.data
+            node = node.right
+
+    def iter_preorder(self,node):
+        stack = [node] if node else []
+        while stack:
+            node = stack.pop()
+            yield node.data
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+
+    def iter_postorder(self,node):
+        stack = [(node,False)] if node else []
+        while stack:
+            node,done = stack.pop()
+            if done:
+                yield node.data
+                continue
+            stack.append((node,True))
+            if node.right:
+                stack.append((node.right,False))
+            if node.left:
+                stack.append((node.left,False))
+
+    def iter_from(self,key,reverse=False):
+        stack = []
+        node = self.root
+        while node:
+            if (node.data <= key) if reverse else (node.data >= key):
+                stack.append(node)
+                node = node.left if reverse else node.right
+            else:
+                node = node.right if reverse else node.left
+        while stack:
+            node = stack.pop()
+            yield node.data
+            node = node.right if reverse else node.left
+            while node:
+                stack.append(node)
+                node = node.left if reverse else node.right
+
+    def range(self,lo,hi,reverse=False):
+        for data in self.iter_from(hi if reverse else lo,reverse):
+            if (data < lo) if reverse else (data > hi):
+                return
+            yield data
+
+    def __iter__(self):
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            yield node.data
+            node = node.left
+
+    def __reversed__(self):
+        return self.iter_inorder(self.root)
+
     def min_value(self,node):
         if not node:
             return None
@@ -77,14 +376,42 @@ class BST:
         return node
     
     def counts_node(self,node):
-        if not node:
-            return 0
-        return 1 + self.counts_node(node.left) + self.counts_node(node.right)
+        return self._size(node)
     
     def height(self,node):
-        if not node:
+        return self._height(node)
+
+    def _count_below(self,key,inclusive):
+        node = self.root
+        count = 0
+        while node:
+            if node.data < key or (inclusive and node.data == key):
+                count += 1 + self._size(node.right)
+                node = node.left
+            else:
+                node = node.right
+        return count
+
+    def rank(self,key):
+        return self._count_below(key,False)
+
+    def select(self,k):
+        node = self.root
+        while node:
+            smaller = self._size(node.right)
+            if k < smaller:
+                node = node.right
+            elif k == smaller:
+                return node.data
+            else:
+                k -= smaller + 1
+                node = node.left
+        return None
+
+    def count_range(self,lo,hi):
+        if hi < lo:
             return 0
-        return 1 + max(self.height(node.left),self.height(node.right))
+        return self._count_below(hi,True) - self._count_below(lo,False)
     
     def count_of_lnode(self,node):
         if not node:
@@ -100,22 +427,182 @@ class BST:
         return node 
     
     def delete(self,node,key):
-        if not node:
-            return None
-        if key < node.data:
-            node.left = self.delete( node.left,key)
-        elif key > node.data:
-            node.right  = self.delete(node.right,key)
+        path = []
+        current = node
+        while current and current.data != key:
+            path.append(current)
+            current = current.left if key > current.data else current.right
+        if not current:
+            return node
+
+        if current.left and current.right:
+            path.append(current)
+            min_node = current.right
+            while min_node.left:
+                path.append(min_node)
+                min_node = min_node.left
+            current.data = min_node.data
+            current,replacement = min_node,min_node.right
         else:
+            replacement = current.left or current.right
+
+        if not path:
+            return replacement
+        self._replace_child(path[-1],current,replacement)
+        return self._retrace(path)
+
+
+
+class PersistentNode(Node):
+    def __init__(self,data,left,right,version):
+        super().__init__(data)
+        self.left = left
+        self.right = right
+        self.version = version
+        self.height = 1 + max(left.height if left else 0,right.height if right else 0)
+        self.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+
+
+class Snapshot:
+    def __init__(self,root,version):
+        self.root = root
+        self.version = version
+
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    def search(self,data):
+        current = self.root
+        while current:
+            if current.data == data:
+                return True
+            elif current.data < data:
+                current = current.left
+            else:
+                current = current.right
+        return False
+
+    def __contains__(self,data):
+        return self.search(data)
+
+    def __iter__(self):
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            yield node.data
+            node = node.left
 
+
+class PersistentBST:
+    def __init__(self):
+        self.current = Snapshot(None,0)
+        self.version = 0
+        self.lock = threading.Lock()
+        self.rotations = 0
+
+    def snapshot(self):
+        return self.current
+
+    def search(self,data):
+        return self.current.search(data)
+
+    def __len__(self):
+        return len(self.current)
+
+    def _height(self,node):
+        return node.height if node else 0
+
+    def _make(self,data,left,right):
+        return PersistentNode(data,left,right,self.version)
+
+    def _balance(self,data,left,right):
+        if self._height(left) > self._height(right) + 1:
+            self.rotations += 1
+            if self._height(left.left) >= self._height(left.right):
+                return self._make(left.data,left.left,self._make(data,left.right,right))
+            middle = left.right
+            return self._make(middle.data,self._make(left.data,left.left,middle.left),self._make(data,middle.right,right))
+        if self._height(right) > self._height(left) + 1:
+            self.rotations += 1
+            if self._height(right.right) >= self._height(right.left):
+                return self._make(right.data,self._make(data,left,right.left),right.right)
+            middle = right.left
+            return self._make(middle.data,self._make(data,left,middle.left),self._make(right.data,middle.right,right.right))
+        return self._make(data,left,right)
+
+    def _insert(self,node,data):
+        if not node:
+            return self._make(data,None,None)
+        if node.data < data:
+            return self._balance(node.data,self._insert(node.left,data),node.right)
+        return self._balance(node.data,node.left,self._insert(node.right,data))
+
+    def _pop_min(self,node):
+        if not node.left:
+            return node.right,node.data
+        left,data = self._pop_min(node.left)
+        return self._balance(node.data,left,node.right),data
+
+    def _delete(self,node,key):
+        if not node:
+            return None
+        if node.data == key:
             if not node.left:
                 return node.right
-            elif not node.right:
+            if not node.right:
                 return node.left
-            min_node = self.min_value(node.right)
-            node.data = min_node.data
-            node.right = self.delete(node.right,min_node.data)
-        return node 
+            right,data = self._pop_min(node.right)
+            return self._balance(data,node.left,right)
+        if key > node.data:
+            left = self._delete(node.left,key)
+            return node if left is node.left else self._balance(node.data,left,node.right)
+        right = self._delete(node.right,key)
+        return node if right is node.right else self._balance(node.data,node.left,right)
+
+    def insert(self,data):
+        with self.lock:
+            self.version = self.current.version + 1
+            self.current = Snapshot(self._insert(self.current.root,data),self.version)
+
+    def delete(self,key):
+        with self.lock:
+            self.version = self.current.version + 1
+            root = self._delete(self.current.root,key)
+            if root is not self.current.root:
+                self.current = Snapshot(root,self.version)
+
+    @staticmethod
+    def diff(old,new):
+        if old.version > new.version:
+            removed,added = PersistentBST.diff(new,old)
+            return added,removed
+        fresh = Counter()
+        shared = set()
+        stack = [new.root]
+        while stack:
+            node = stack.pop()
+            if not node:
+                continue
+            if node.version <= old.version:
+                shared.add(id(node))
+                continue
+            fresh[node.data] += 1
+            stack.append(node.left)
+            stack.append(node.right)
+        gone = Counter()
+        stack = [old.root]
+        while stack:
+            node = stack.pop()
+            if not node or id(node) in shared:
+                continue
+            gone[node.data] += 1
+            stack.append(node.left)
+            stack.append(node.right)
+        return sorted((fresh - gone).elements()),sorted((gone - fresh).elements())
 
     
         
@@ -154,4 +641,40 @@ print("\nDeleting node 30...")
 bst.root = bst.delete(bst.root, 30)
 
 print("Inorder after deletion:")
-bst.inorder(bst.root)
\ No newline at end of file
+bst.inorder(bst.root)
+
+avl = BST(balanced=True)
+for val in range(1,101):
+    avl.insert(val)
+print("\n\nBalanced height after 100 sorted inserts:",avl.height(avl.root))
+for val in range(1,51):
+    avl.root = avl.delete(avl.root,val)
+print("Balanced height after 50 deletes:",avl.height(avl.root))
+print("Rotations:",avl.rotations,"Rebalances:",avl.rebalances)
+print("Size:",len(avl),"Rank of 75:",avl.rank(75),"10th smallest:",avl.select(10))
+print("Keys between 60 and 69:",avl.count_range(60,69))
+print("Keys from 95 up:",list(avl.iter_from(95)))
+print("Keys 60..64 descending:",list(avl.range(60,64,reverse=True)))
+print("Preorder via generator:",list(bst.iter_preorder(bst.root)))
+
+built = BST.from_sorted(range(1,16),balanced=True)
+print("Bulk-loaded height:",built.height(built.root),"size:",len(built))
+low,high = built.split(8)
+print("Split at 8:",list(low),list(high))
+joined = BST.join(low,high)
+print("Joined back:",list(joined),"height:",joined.height(joined.root))
+
+live = PersistentBST()
+for val in range(1,21):
+    live.insert(val)
+before = live.snapshot()
+live.insert(25)
+live.delete(3)
+after = live.snapshot()
+print("Snapshot sizes:",len(before),len(after),"3 in old snapshot:",3 in before)
+print("Diff (added, removed):",PersistentBST.diff(before,after))
+
+bst_file = os.path.join(tempfile.gettempdir(),'bst.bin')
+avl.dump(bst_file)
+reloaded = BST.load(bst_file)
+print("Reloaded BST size:",len(reloaded),"height:",reloaded.height(reloaded.root),"first keys:",list(reloaded.iter_from(0))[:5])
@@ -1,3 +1,5 @@
+from graph_utils import visited_set
+
 graph = {
     'A': ['B', 'C', 'G'],
     'B': ['A', 'D', 'E'],
@@ -7,10 +9,10 @@ graph = {
     'F': ['C', 'E'],
     'G': []
 }
-def  dfs(graph,start):
+def  dfs(graph,start,ids=None):
     if not start:
         return 
-    visited = set()
+    visited = visited_set(ids)
     stack = [start]
     while stack:
         node = stack.pop()
@@ -36,6 +38,45 @@ def dfs_r(graph,start,visited = None):
             dfs_r(graph,neighbour,visited)
     
 dfs_r(graph,'A')
+print('')
+
+def dfs_events(graph,start,visited=None,ids=None,directed=False):
+    if visited is None:
+        visited = visited_set(ids)
+    if not start or start in visited:
+        return
+    visited.add(start)
+    on_stack = visited_set(ids)
+    on_stack.add(start)
+    yield 'pre',start
+    stack = [[start,iter(graph[start]),None]]
+    while stack:
+        frame = stack[-1]
+        node,neighbours = frame[0],frame[1]
+        for neighbour in neighbours:
+            if neighbour not in visited:
+                visited.add(neighbour)
+                on_stack.add(neighbour)
+                yield 'pre',neighbour
+                stack.append([neighbour,iter(graph[neighbour]),node])
+                break
+            if neighbour == frame[2] and not directed:
+                frame[2] = None
+                continue
+            if neighbour in on_stack:
+                yield 'back',(node,neighbour)
+        else:
+            stack.pop()
+            on_stack.discard(node)
+            yield 'post',node
+
+def dfs_iter(graph,start,visited=None,ids=None,directed=False):
+    for event,node in dfs_events(graph,start,visited,ids,directed):
+        if event == 'pre':
+            yield node
+
+print(' '.join(dfs_iter(graph,'A')))
+print([node for event,node in dfs_events(graph,'A') if event == 'post'])
 
 
 
@@ -0,0 +1,70 @@
+import ast
+import mmap
+import struct
+from array import array
+
+TREE_HEADER = struct.Struct('<4scB2xq')
+TYPECODES = 'qdsbr'
+
+
+def padding(size):
+    return -size % 8
+
+
+def open_view(path):
+    with open(path,'rb') as f:
+        return memoryview(mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ))
+
+
+def is_literal(value):
+    try:
+        back = ast.literal_eval(repr(value))
+    except (ValueError,TypeError,SyntaxError,MemoryError,RecursionError):
+        return False
+    return type(back) is type(value) and back == value
+
+
+def value_typecode(values):
+    if all(type(value) is int and -2**63 <= value < 2**63 for value in values):
+        return 'q'
+    if all(type(value) is float for value in values):
+        return 'd'
+    if all(type(value) is str for value in values):
+        return 's'
+    if all(type(value) is bytes for value in values):
+        return 'b'
+    if all(is_literal(value) for value in values):
+        return 'r'
+    return None
+
+
+def write_values(f,values,typecode):
+    if typecode in 'qd':
+        array(typecode,values).tofile(f)
+        return
+    if typecode == 's':
+        blobs = [value.encode() for value in values]
+    elif typecode == 'r':
+        blobs = [repr(value).encode() for value in values]
+    else:
+        blobs = list(values)
+    offsets = array('q',[0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    offsets.tofile(f)
+    f.write(b''.join(blobs))
+    f.write(bytes(padding(offsets[-1])))
+
+
+def read_values(view,start,n,typecode):
+    if typecode in 'qd':
+        end = start + 8 * n
+        return view[start:end].cast(typecode),end
+    offsets = view[start:start + 8 * (n + 1)].cast('q')
+    base = start + 8 * (n + 1)
+    values = [bytes(view[base + offsets[i]:base + offsets[i+1]]) for i in range(n)]
+    if typecode == 's':
+        values = [value.decode() for value in values]
+    elif typecode == 'r':
+        values = [ast.literal_eval(value.decode()) for value in values]
+    return values,base + offsets[n] + padding(offsets[n])
@@ -1,3 +1,11 @@
+import os
+import tempfile
+from collections import deque
+
+from binary_format import TREE_HEADER,TYPECODES,open_view,read_values,value_typecode,write_values
+
+SHAPED = 1
+
 
 class Node:
     def __init__(self,data):
@@ -12,9 +20,9 @@ class BinaryTree:
 
     def insert(self,data):
 
-        queue = [self.root]
+        queue = deque([self.root])
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             if not current.left:
                 current.left = Node(data)
                 return
@@ -53,6 +61,101 @@ class BinaryTree:
             self.postorder(node.right)
             print(node.data,end=" ")
 
+    def iter_inorder(self,node):
+        stack = []
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.data
+            node = node.right
+
+    def iter_preorder(self,node):
+        stack = [node] if node else []
+        while stack:
+            node = stack.pop()
+            yield node.data
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+
+    def iter_postorder(self,node):
+        stack = [(node,False)] if node else []
+        while stack:
+            node,done = stack.pop()
+            if done:
+                yield node.data
+                continue
+            stack.append((node,True))
+            if node.right:
+                stack.append((node.right,False))
+            if node.left:
+                stack.append((node.left,False))
+
+    def iter_level_order(self):
+        queue = deque([self.root] if self.root else [])
+        while queue:
+            current = queue.popleft()
+            yield current.data
+            if current.left:
+                queue.append(current.left)
+            if current.right:
+                queue.append(current.right)
+
+    def dump(self,path):
+        keys = []
+        shape = bytearray()
+        queue = deque([self.root] if self.root else [])
+        while queue:
+            current = queue.popleft()
+            keys.append(current.data)
+            shape.append((1 if current.left else 0) | (2 if current.right else 0))
+            if current.left:
+                queue.append(current.left)
+            if current.right:
+                queue.append(current.right)
+        typecode = value_typecode(keys)
+        if typecode is None:
+            print('keys must be Python literals to be dumped')
+            return False
+        with open(path,'wb') as f:
+            f.write(TREE_HEADER.pack(b'BTR1',typecode.encode(),SHAPED,len(keys)))
+            write_values(f,keys,typecode)
+            f.write(shape)
+        return True
+
+    @classmethod
+    def load(cls,path):
+        view = open_view(path)
+        magic,typecode,flags,n = TREE_HEADER.unpack_from(view)
+        if magic != b'BTR1':
+            print('not a binary tree file')
+            return None
+        if typecode not in TYPECODES.encode():
+            print('unknown key encoding')
+            return None
+        keys,start = read_values(view,TREE_HEADER.size,n,typecode.decode())
+        nodes = [Node(key) for key in keys]
+        if not flags & SHAPED:
+            for i in range(1,n):
+                if i % 2:
+                    nodes[(i - 1) // 2].left = nodes[i]
+                else:
+                    nodes[(i - 1) // 2].right = nodes[i]
+            return cls(nodes[0] if nodes else None)
+        shape = view[start:start + n]
+        child = 1
+        for i in range(n):
+            if shape[i] & 1:
+                nodes[i].left = nodes[child]
+                child += 1
+            if shape[i] & 2:
+                nodes[i].right = nodes[child]
+                child += 1
+        return cls(nodes[0] if nodes else None)
+
     def height(self,node):
         if not node:
             return 0 
@@ -67,11 +170,11 @@ class BinaryTree:
     
     def find_deepest_and_perant(self):
 
-        queue = [self.root]
+        queue = deque([self.root])
         parent = None
         current = None
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             if current.left:
                 parent = current
                 queue.append(current.left)
@@ -86,11 +189,11 @@ class BinaryTree:
         if self.root.data == value and  not self.root.left and not self.root.right:
             self.root = None
             return
-        queue = [self.root]
+        queue = deque([self.root])
         node_to_delete = None
 
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             if current.data== value:
                 node_to_delete = current
             if current.left:
@@ -109,9 +212,9 @@ class BinaryTree:
     def level_order(self):
         if not self.root:
             return
-        queue = [self.root]
+        queue = deque([self.root])
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             print(current.data)
 
             if current.left:
@@ -121,6 +224,145 @@ class BinaryTree:
 
 
 
+class ArrayBinaryTree:
+
+    def __init__(self,root=None,indexed=False):
+        self.data = []
+        self.index = {} if indexed else None
+        if root is not None:
+            self.insert(root)
+
+    def parent(self,index):
+        return (index - 1) // 2
+
+    def left(self,index):
+        return 2 * index + 1
+
+    def right(self,index):
+        return 2 * index + 2
+
+    def insert(self,data):
+        if self.index is not None:
+            self.index.setdefault(data,set()).add(len(self.data))
+        self.data.append(data)
+
+    def search(self,data):
+        if self.index is not None:
+            return data in self.index
+        return data in self.data
+
+    def delete(self,value):
+        if self.index is not None:
+            if value not in self.index:
+                return
+            i = max(self.index[value])
+        else:
+            i = len(self.data) - 1
+            while i >= 0 and self.data[i] != value:
+                i -= 1
+            if i < 0:
+                return
+        last = len(self.data) - 1
+        if self.index is not None:
+            self._unindex(value,i)
+            if i != last:
+                self._unindex(self.data[last],last)
+                self.index.setdefault(self.data[last],set()).add(i)
+        self.data[i] = self.data[last]
+        self.data.pop()
+
+    def _unindex(self,value,i):
+        positions = self.index[value]
+        positions.discard(i)
+        if not positions:
+            del self.index[value]
+
+    def dump(self,path):
+        typecode = value_typecode(self.data)
+        if typecode is None:
+            print('keys must be Python literals to be dumped')
+            return False
+        with open(path,'wb') as f:
+            f.write(TREE_HEADER.pack(b'BTR1',typecode.encode(),0,len(self.data)))
+            write_values(f,self.data,typecode)
+        return True
+
+    @classmethod
+    def load(cls,path,indexed=False):
+        view = open_view(path)
+        magic,typecode,flags,n = TREE_HEADER.unpack_from(view)
+        if magic != b'BTR1':
+            print('not a binary tree file')
+            return None
+        if typecode not in TYPECODES.encode():
+            print('unknown key encoding')
+            return None
+        keys,start = read_values(view,TREE_HEADER.size,n,typecode.decode())
+        if flags & SHAPED:
+            bits = [shape >> side & 1 for shape in view[start:start + n] for side in (0,1)]
+            if bits != sorted(bits,reverse=True):
+                print('tree is not complete')
+                return None
+        tree = cls(indexed=indexed)
+        tree.data = list(keys)
+        if indexed:
+            for i,data in enumerate(tree.data):
+                tree.index.setdefault(data,set()).add(i)
+        return tree
+
+    def height(self):
+        return len(self.data).bit_length()
+
+    def counts(self):
+        return len(self.data)
+
+    def find_deepest_and_perant(self):
+        if not self.data:
+            return None,None
+        last = len(self.data) - 1
+        return last,(self.parent(last) if last else None)
+
+    def iter_inorder(self,index=0):
+        stack = []
+        while stack or index < len(self.data):
+            while index < len(self.data):
+                stack.append(index)
+                index = self.left(index)
+            index = stack.pop()
+            yield self.data[index]
+            index = self.right(index)
+
+    def iter_preorder(self,index=0):
+        stack = [index] if index < len(self.data) else []
+        while stack:
+            index = stack.pop()
+            yield self.data[index]
+            if self.right(index) < len(self.data):
+                stack.append(self.right(index))
+            if self.left(index) < len(self.data):
+                stack.append(self.left(index))
+
+    def iter_postorder(self,index=0):
+        stack = [(index,False)] if index < len(self.data) else []
+        while stack:
+            index,done = stack.pop()
+            if done:
+                yield self.data[index]
+                continue
+            stack.append((index,True))
+            if self.right(index) < len(self.data):
+                stack.append((self.right(index),False))
+            if self.left(index) < len(self.data):
+                stack.append((self.left(index),False))
+
+    def iter_level_order(self):
+        return iter(self.data)
+
+    def level_order(self):
+        for data in self.data:
+            print(data)
+
+
 bt = BinaryTree(Node(1))
 bt.insert(2)
 bt.insert(3)
@@ -149,4 +391,21 @@ bt.level_order()
 
 bt.delete(2)
 print("\nLevel Order After Deletion of 2:")
-bt.level_order()
\ No newline at end of file
+bt.level_order()
+
+print("Inorder via generator:",list(bt.iter_inorder(bt.root)))
+print("Postorder via generator:",list(bt.iter_postorder(bt.root)))
+print("Level order via generator:",list(bt.iter_level_order()))
+
+abt = ArrayBinaryTree(1,indexed=True)
+for i in range(2,8):
+    abt.insert(i)
+print("Array inorder:",list(abt.iter_inorder()))
+print("Array search 5:",abt.search(5))
+abt.delete(2)
+print("Array level order after deleting 2:",list(abt.iter_level_order()))
+
+tree_file = os.path.join(tempfile.gettempdir(),'binary_tree.bin')
+bt.dump(tree_file)
+print("Reloaded BinaryTree level order:",list(BinaryTree.load(tree_file).iter_level_order()))
+print("Reloaded as ArrayBinaryTree:",ArrayBinaryTree.load(tree_file).data)
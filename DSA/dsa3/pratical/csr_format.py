@@ -0,0 +1,84 @@
+import struct
+from array import array
+
+from binary_format import open_view,padding,read_values,value_typecode,write_values
+
+HEADER = struct.Struct('<4sIqq')
+INT_LABELS = 1
+RANGE_LABELS = 2
+WEIGHTED = 4
+FLOAT_LABELS = 8
+STR_LABELS = 16
+BYTES_LABELS = 32
+REPR_LABELS = 64
+LABEL_FLAGS = {'q':INT_LABELS,'d':FLOAT_LABELS,'s':STR_LABELS,'b':BYTES_LABELS,'r':REPR_LABELS}
+INT_WEIGHTS = 128
+REPR_WEIGHTS = 256
+WEIGHT_FLAGS = {'q':INT_WEIGHTS,'d':0,'r':REPR_WEIGHTS}
+
+
+def save_csr(path,offsets,targets,labels,weights=None):
+    n,m = len(labels),len(targets)
+    typecode = None if isinstance(labels,range) else value_typecode(labels)
+    if typecode is None and not isinstance(labels,range):
+        print('labels must be Python literals to be saved')
+        return False
+    if typecode is None or typecode == 'q' and list(labels) == list(range(n)):
+        typecode = None
+        flags = RANGE_LABELS
+    else:
+        flags = LABEL_FLAGS[typecode]
+    if weights is not None:
+        weight_typecode = value_typecode(weights)
+        if weight_typecode not in WEIGHT_FLAGS or weight_typecode == 'r' and not all(isinstance(w,(int,float)) for w in weights):
+            print('weights must be numbers to be saved')
+            return False
+        flags |= WEIGHTED | WEIGHT_FLAGS[weight_typecode]
+    with open(path,'wb') as f:
+        f.write(HEADER.pack(b'CSRG',flags,n,m))
+        array('q',offsets).tofile(f)
+        array('i',targets).tofile(f)
+        f.write(bytes(padding(4 * m)))
+        if weights is not None:
+            write_values(f,weights,weight_typecode)
+        if typecode:
+            write_values(f,labels,typecode)
+    return True
+
+
+def load_csr(path):
+    view = open_view(path)
+    magic,flags,n,m = HEADER.unpack_from(view)
+    if magic != b'CSRG':
+        print('not a CSR graph file')
+        return None
+    start = HEADER.size
+    offsets = view[start:start + 8 * (n + 1)].cast('q')
+    start += 8 * (n + 1)
+    targets = view[start:start + 4 * m].cast('i')
+    start += 4 * m + padding(4 * m)
+    weights = None
+    if flags & WEIGHTED:
+        weight_typecode = 'q' if flags & INT_WEIGHTS else 'r' if flags & REPR_WEIGHTS else 'd'
+        weights,start = read_values(view,start,m,weight_typecode)
+    if flags & RANGE_LABELS:
+        labels = range(n)
+    else:
+        typecode = next((code for code,flag in LABEL_FLAGS.items() if flags & flag),None)
+        if typecode is None:
+            print('unknown label encoding')
+            return None
+        labels,_ = read_values(view,start,n,typecode)
+    return view,offsets,targets,weights,labels
+
+
+class CSRBase:
+    def __len__(self):
+        return len(self.labels)
+
+    def node_id(self,node):
+        if isinstance(self.labels,range):
+            return self.labels.index(node) if node in self.labels else -1
+        if self.index is None:
+            self.index = {label:i for i,label in enumerate(self.labels)}
+        return self.index.get(node,-1)
@@ -1,34 +1,175 @@
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED,ProcessPoolExecutor,ThreadPoolExecutor,wait
+
+from graph_utils import strongly_connected
+
+
+def timed_call(task):
+    start = time.time()
+    clock = time.perf_counter()
+    result = task() if task else None
+    duration = time.perf_counter() - clock
+    return result,start,time.time(),duration
+
+
 class Graph:
-    def __init__(self):
+    def __init__(self,online=False):
         self.graph = {}
+        self.incoming = {}
+        self.online = online
+        self.order = {}
+        self.next_order = 0
         
     def add_node(self,node):
         if node not in self.graph:
-            self.graph[node] = []
+            self.graph[node] = {}
+            self.incoming[node] = {}
+            if self.online:
+                self.order[node] = self.next_order
+                self.next_order += 1
         
     def add_edge(self,u,v,undirected = True):
         self.add_node(u)
         self.add_node(v)
-        self.graph[u].append(v)
-        if  undirected:
-            self.graph[v].append(u)
+        if self.online:
+            if u == v or undirected or not self._reorder(u,v):
+                return False
+        self._link(u,v)
+        if undirected:
+            self._link(v,u)
+        return True
+
+    def _reorder(self,u,v):
+        order = self.order
+        lower,upper = order[v],order[u]
+        if lower > upper:
+            return True
+        forward = []
+        seen = {v}
+        stack = [v]
+        while stack:
+            node = stack.pop()
+            forward.append(node)
+            for i in self.graph[node]:
+                if order[i] == upper:
+                    return False
+                if i not in seen and order[i] < upper:
+                    seen.add(i)
+                    stack.append(i)
+        backward = []
+        seen = {u}
+        stack = [u]
+        while stack:
+            node = stack.pop()
+            backward.append(node)
+            for i in self.incoming[node]:
+                if i not in seen and order[i] > lower:
+                    seen.add(i)
+                    stack.append(i)
+        forward.sort(key=order.get)
+        backward.sort(key=order.get)
+        moved = backward + forward
+        slots = sorted(order[node] for node in moved)
+        for node,slot in zip(moved,slots):
+            order[node] = slot
+        return True
+
+    def strongly_connected_components(self):
+        nodes = list(self.graph)
+        ids = {node:i for i,node in enumerate(nodes)}
+        n = len(nodes)
+        comp = array('i',[-1]) * n
+        components = strongly_connected(self.graph)
+        found = len(components)
+        for c,component in enumerate(components):
+            for node in component:
+                comp[ids[node]] = found - 1 - c
+        dag = {c:set() for c in range(found)}
+        for u in range(n):
+            for v in self.graph[nodes[u]]:
+                if comp[u] != comp[ids[v]]:
+                    dag[comp[u]].add(comp[ids[v]])
+        return nodes,comp,dag
+
+    def run_tasks(self,tasks,workers=None,processes=False):
+        if self.is_cyclic():
+            print('graph has a cycle')
+            return None
+        indegree = {node:len(self.incoming[node]) for node in self.graph}
+        ready = [node for node in self.graph if not indegree[node]]
+        results = {}
+        stats = {}
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(max_workers=workers) as executor:
+            running = {}
+            while ready or running:
+                for node in ready:
+                    running[executor.submit(timed_call,tasks.get(node))] = node
+                ready = []
+                done,_ = wait(running,return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    results[node],start,end,duration = future.result()
+                    stats[node] = (start,end,duration)
+                    for i in self.graph[node]:
+                        indegree[i] -= 1
+                        if not indegree[i]:
+                            ready.append(i)
+        return results,stats
+
+    def critical_path(self,stats):
+        finish = {}
+        best = {}
+        for node in stats:
+            before = max(self.incoming[node],key=lambda i: finish[i],default=None)
+            finish[node] = stats[node][2] + (finish[before] if before is not None else 0)
+            best[node] = before
+        if not finish:
+            return [],0
+        node = max(finish,key=finish.get)
+        total = finish[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = best[node]
+        return path[::-1],total
+
+    def topological_order(self):
+        return sorted(self.graph,key=self.order.get)
+
+    def _link(self,u,v):
+        self.graph[u][v] = self.graph[u].get(v,0) + 1
+        self.incoming[v][u] = self.incoming[v].get(u,0) + 1
+
+    def _unlink(self,u,v):
+        if u not in self.graph or v not in self.graph[u]:
+            return
+        self.graph[u][v] -= 1
+        self.incoming[v][u] -= 1
+        if not self.graph[u][v]:
+            del self.graph[u][v]
+            del self.incoming[v][u]
            
     def remove_edge(self,u,v,undericted = True):
-        if u in self.graph and v in self.graph[u]:
-            self.graph[u].remove(v)
-        if undericted and  v in self.graph and  u in self.graph[v]:
-            self.graph[v].remove(u)
+        self._unlink(u,v)
+        if undericted:
+            self._unlink(v,u)
             
     def remove_node(self,node):
-        if node in self.graph:
-            del self.graph[node]
-        for i in self.graph:
-            if node in self.graph[i]:
-                self.graph[i].remove(node)
+        if node not in self.graph:
+            return
+        for i in self.incoming.pop(node):
+            if i != node:
+                del self.graph[i][node]
+        for i in self.graph.pop(node):
+            if i != node:
+                del self.incoming[i][node]
+        self.order.pop(node,None)
                 
     def show_graph(self):
         for node in self.graph:
-            print(node,'----->',self.graph[node])
+            print(node,'----->',list(self.graph[node]))
     
      
     def is_cyclic_until(self,node,visited,recStack):
@@ -43,12 +184,42 @@ class Graph:
         recStack[node] = False        
         return False
         
+    def back_edges_from(self,node,visited,recStack):
+        visited[node] = True
+        recStack[node] = True
+        stack = [(node,iter(self.graph.get(node,[])))]
+        while stack:
+            current,neighbours = stack[-1]
+            for i in neighbours:
+                if not visited.get(i,False):
+                    visited[i] = True
+                    recStack[i] = True
+                    stack.append((i,iter(self.graph.get(i,[]))))
+                    break
+                elif recStack.get(i,False):
+                    yield current,i
+            else:
+                stack.pop()
+                recStack[current] = False
+
+    def is_cyclic_until_iter(self,node,visited,recStack):
+        for edge in self.back_edges_from(node,visited,recStack):
+            return True
+        return False
+
+    def back_edges(self):
+        visited = {}
+        recStack = {}
+        for i in self.graph:
+            if not visited.get(i,False):
+                yield from self.back_edges_from(i,visited,recStack)
+
     def is_cyclic(self):
         visited = {}
         recStack = {}
         for i in self.graph:
             if not visited.get(i,False):
-                if self.is_cyclic_until(i,visited,recStack):
+                if self.is_cyclic_until_iter(i,visited,recStack):
                     return True
         return False
          
@@ -60,11 +231,30 @@ g.add_edge('c','B',False )
  
 g.show_graph()
 print("Cycle Exists? ->", g.is_cyclic())
+print("Back edges ->", list(g.back_edges()))
 
+og = Graph(online=True)
+print(og.add_edge('C','D',False))
+print(og.add_edge('B','C',False))
+print(og.add_edge('A','B',False))
+print(og.add_edge('D','A',False))
+print("Topological order ->", og.topological_order())
 
+g.add_edge('c','D',False)
+g.add_edge('D','E',False)
+g.add_edge('E','D',False)
+nodes,comp,dag = g.strongly_connected_components()
+print("Components ->", dict(zip(nodes,comp)))
+print("Condensation ->", dag)
 
- 
-            
-            
-        
-    
\ No newline at end of file
+build = Graph()
+build.add_edge('fetch','compile',False)
+build.add_edge('fetch','docs',False)
+build.add_edge('compile','test',False)
+build.add_edge('docs','package',False)
+build.add_edge('test','package',False)
+steps = {node:(lambda node=node: time.sleep(0.01) or node.upper()) for node in build.graph}
+results,stats = build.run_tasks(steps,workers=4)
+print("Results ->", results)
+print("Critical path ->", build.critical_path(stats)[0])
+print("Run on cyclic graph ->", g.run_tasks({}))
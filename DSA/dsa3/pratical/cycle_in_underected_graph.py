@@ -1,34 +1,123 @@
+from array import array
+
+
 class Graph:
     def __init__(self):
         self.graph = {}
+        self.incoming = {}
+        self.ids = {}
+        self.uf_parent = array('i')
+        self.uf_rank = bytearray()
+        self.components = 0
+        self.uf_dirty = False
         
     def add_node(self,node):
         if node not in self.graph:
-            self.graph[node] = []
+            self.graph[node] = {}
+            self.incoming[node] = {}
+            self._make_set(node)
         
     def add_edge(self,u,v,undirected = True):
         self.add_node(u)
         self.add_node(v)
-        self.graph[u].append(v)
-        if  undirected:
-            self.graph[v].append(u)
+        self._link(u,v)
+        if undirected:
+            self._link(v,u)
+        if not self.uf_dirty:
+            self._union(self.ids[u],self.ids[v])
+
+    def add_edges(self,edges,undirected = True):
+        for u,v in edges:
+            self.add_edge(u,v,undirected)
+
+    def _make_set(self,node):
+        self.ids[node] = len(self.uf_parent)
+        self.uf_parent.append(len(self.uf_parent))
+        self.uf_rank.append(0)
+        self.components += 1
+
+    def _find(self,i):
+        parent = self.uf_parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i],i = root,parent[i]
+        return root
+
+    def _union(self,i,j):
+        i,j = self._find(i),self._find(j)
+        if i == j:
+            return False
+        rank = self.uf_rank
+        if rank[i] < rank[j]:
+            i,j = j,i
+        self.uf_parent[j] = i
+        if rank[i] == rank[j]:
+            rank[i] += 1
+        self.components -= 1
+        return True
+
+    def _rebuild_sets(self):
+        self.ids = {}
+        self.uf_parent = array('i')
+        self.uf_rank = bytearray()
+        self.components = 0
+        for node in self.graph:
+            self._make_set(node)
+        for u in self.graph:
+            for v in self.graph[u]:
+                self._union(self.ids[u],self.ids[v])
+        self.uf_dirty = False
+
+    def connected(self,u,v):
+        if u not in self.graph or v not in self.graph:
+            return False
+        if self.uf_dirty:
+            self._rebuild_sets()
+        return self._find(self.ids[u]) == self._find(self.ids[v])
+
+    def creates_cycle(self,u,v):
+        return u == v or self.connected(u,v)
+
+    def component_count(self):
+        if self.uf_dirty:
+            self._rebuild_sets()
+        return self.components
+
+    def _link(self,u,v):
+        self.graph[u][v] = self.graph[u].get(v,0) + 1
+        self.incoming[v][u] = self.incoming[v].get(u,0) + 1
+
+    def _unlink(self,u,v):
+        if u not in self.graph or v not in self.graph[u]:
+            return
+        self.graph[u][v] -= 1
+        self.incoming[v][u] -= 1
+        if not self.graph[u][v]:
+            del self.graph[u][v]
+            del self.incoming[v][u]
            
     def remove_edge(self,u,v,undericted = True):
-        if u in self.graph and v in self.graph[u]:
-            self.graph[u].remove(v)
-        if undericted and  v in self.graph and  u in self.graph[v]:
-            self.graph[v].remove(u)
+        self._unlink(u,v)
+        if undericted:
+            self._unlink(v,u)
+        self.uf_dirty = True
             
     def remove_node(self,node):
-        if node in self.graph:
-            del self.graph[node]
-        for i in self.graph:
-            if node in self.graph[i]:
-                self.graph[i].remove(node)
+        if node not in self.graph:
+            return
+        for i in self.incoming.pop(node):
+            if i != node:
+                del self.graph[i][node]
+        for i in self.graph.pop(node):
+            if i != node:
+                del self.incoming[i][node]
+        self.uf_dirty = True
                 
     def show_graph(self):
         for node in self.graph:
-            print(node,'----->',self.graph[node])
+            print(node,'----->',list(self.graph[node]))
     
     def is_cyclic_until(self,node,visited,parent):
         visited[node] = True
@@ -41,11 +130,49 @@ class Graph:
         return False    
         
         
+    def is_cyclic_until_iter(self,node,visited,parent):
+        visited[node] = True
+        stack = [(node,parent,iter(self.graph[node]))]
+        while stack:
+            current,parent,neighbours = stack[-1]
+            for neghibour in neighbours:
+                if not visited.get(neghibour,False):
+                    visited[neghibour] = True
+                    stack.append((neghibour,current,iter(self.graph[neghibour])))
+                    break
+                elif neghibour != parent:
+                    return True
+            else:
+                stack.pop()
+        return False
+
+    def back_edges(self):
+        visited = {}
+        for node in self.graph:
+            if visited.get(node,False):
+                continue
+            visited[node] = True
+            on_stack = {node}
+            stack = [(node,-1,iter(self.graph[node]))]
+            while stack:
+                current,parent,neighbours = stack[-1]
+                for neghibour in neighbours:
+                    if not visited.get(neghibour,False):
+                        visited[neghibour] = True
+                        on_stack.add(neghibour)
+                        stack.append((neghibour,current,iter(self.graph[neghibour])))
+                        break
+                    elif neghibour != parent and neghibour in on_stack:
+                        yield current,neghibour
+                else:
+                    stack.pop()
+                    on_stack.discard(current)
+
     def is_cyclic(self):
         visited = {}
         for node in self.graph:
             if not visited.get(node,False):
-                if self.is_cyclic_until(node,visited,-1):
+                if self.is_cyclic_until_iter(node,visited,-1):
                     return True
         return False
             
@@ -57,6 +184,15 @@ g.add_edge('c','A' )
  
 g.show_graph()
 print("Cycle Exists? ->", g.is_cyclic())
+print("Back edges ->", list(g.back_edges()))
+
+g.add_edges([('D','E'),('E','F')])
+print("Components ->", g.component_count())
+print("A connected to c? ->", g.connected('A','c'))
+print("Would D-F create a cycle? ->", g.creates_cycle('D','F'))
+print("Would A-D create a cycle? ->", g.creates_cycle('A','D'))
+g.remove_node('E')
+print("Components after removing E ->", g.component_count())
 
  
 
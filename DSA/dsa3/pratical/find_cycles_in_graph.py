@@ -1,3 +1,5 @@
+from graph_utils import strongly_connected
+
 gr = {
     'A': ['B','D'],
     'B': ['A','C','E'],
@@ -12,31 +14,140 @@ gr = {
 
 
 
-def cycle_until(node,visited,gr,parent,path,cycle):
+def cycle_until(node,visited,gr,parent,path,cycle,position=None,seen=None):
+    if position is None:
+        position = {}
+    if seen is None:
+        seen = set(tuple(c) for c in cycle)
     visited[node] = True
+    position[node] = len(path)
     path.append(node)
     for i in gr[node]:
         if i not in visited:
-            cycle_until(i,visited,gr,node,path,cycle)
-        elif i != parent and i in path:
+            cycle_until(i,visited,gr,node,path,cycle,position,seen)
+        elif i != parent and i in position:
             
-            j = path.index(i)
+            j = position[i]
             c = path[j:].copy()
             
-            if c not in cycle:
+            if tuple(c) not in seen:
+                seen.add(tuple(c))
                 cycle.append(c)
     path.pop()
+    del position[node]
   
 
 
 def cycle(gr):
     visited = {}
     cycles = []
+    seen = set()
     for i in gr:
         if i not in visited:
-            cycle_until(i,visited,gr,None,[],cycles)
+            cycle_until(i,visited,gr,None,[],cycles,{},seen)
     return cycles
 
+
+def fundamental_cycles(gr):
+    parent = {}
+    order = {}
+    for root in gr:
+        if root in order:
+            continue
+        parent[root] = None
+        order[root] = len(order)
+        stack = [(root,iter(gr[root]))]
+        while stack:
+            node,neighbours = stack[-1]
+            for i in neighbours:
+                if i not in order:
+                    parent[i] = node
+                    order[i] = len(order)
+                    stack.append((i,iter(gr[i])))
+                    break
+                if i == node:
+                    yield [node]
+                elif i != parent[node] and order[i] < order[node]:
+                    c = [node]
+                    while c[-1] != i:
+                        c.append(parent[c[-1]])
+                    yield c[::-1]
+            else:
+                stack.pop()
+
+
+def unblock(node,blocked,B):
+    stack = {node}
+    while stack:
+        node = stack.pop()
+        if node in blocked:
+            blocked.remove(node)
+            stack.update(B[node])
+            B[node].clear()
+
+
+def canonical(c,directed):
+    k = c.index(min(c))
+    c = c[k:] + c[:k]
+    if not directed and len(c) > 2 and c[1] > c[-1]:
+        c = [c[0]] + c[:0:-1]
+    return tuple(c)
+
+
+def simple_cycles(gr,directed=False):
+    labels = list(gr)
+    ids = {node:i for i,node in enumerate(labels)}
+    adj = {}
+    for node in labels:
+        adj[ids[node]] = set(ids[i] for i in gr[node])
+        if ids[node] in adj[ids[node]]:
+            yield [node]
+            adj[ids[node]].discard(ids[node])
+    seen = set()
+    components = [c for c in strongly_connected(adj) if len(c) > 1]
+    while components:
+        component = components.pop()
+        sub = {i:adj[i] & component for i in component}
+        start = min(component)
+        path = [start]
+        blocked = {start}
+        closed = set()
+        B = {i:set() for i in component}
+        stack = [(start,list(sub[start]))]
+        while stack:
+            node,neighbours = stack[-1]
+            if neighbours:
+                i = neighbours.pop()
+                if i == start:
+                    closed.update(path)
+                    if directed:
+                        yield [labels[j] for j in path]
+                    elif len(path) > 2:
+                        key = canonical(path,directed)
+                        if key not in seen:
+                            seen.add(key)
+                            yield [labels[j] for j in key]
+                elif i not in blocked:
+                    path.append(i)
+                    stack.append((i,list(sub[i])))
+                    closed.discard(i)
+                    blocked.add(i)
+                    continue
+            if not neighbours:
+                if node in closed:
+                    unblock(node,blocked,B)
+                else:
+                    for i in sub[node]:
+                        B[i].add(node)
+                stack.pop()
+                path.pop()
+        component.discard(start)
+        rest = {i:adj[i] & component for i in component}
+        components.extend(c for c in strongly_connected(rest) if len(c) > 1)
+
 a = cycle(gr)
 print(a)
 print(len(a))
+
+print(list(fundamental_cycles(gr)))
+print(len(list(simple_cycles(gr))))
@@ -1,85 +1,536 @@
+import asyncio
+import os
+import tempfile
+from array import array
+from collections import OrderedDict,deque
+from concurrent.futures import ProcessPoolExecutor,as_completed
+from itertools import islice
+from multiprocessing import shared_memory
+
+from csr_format import CSRBase,load_csr,save_csr
+from graph_utils import VisitedSet
+
+
+shared_graph = None
+
+
+def attach_shared_graph(name,n,m):
+    global shared_graph
+    block = shared_memory.SharedMemory(name=name)
+    offsets = block.buf[:8 * (n + 1)].cast('q')
+    targets = block.buf[8 * (n + 1):8 * (n + 1) + 4 * m].cast('i')
+    shared_graph = (block,offsets,targets,n)
+
+
+def bfs_shard(sources,counts_only):
+    block,offsets,targets,n = shared_graph
+    results = []
+    for source in sources:
+        dist = array('i',[-1]) * n
+        dist[source] = 0
+        frontier = [source]
+        depth = 0
+        reached = 1
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for i in targets[offsets[node]:offsets[node+1]]:
+                    if dist[i] < 0:
+                        dist[i] = depth + 1
+                        next_frontier.append(i)
+            if not next_frontier:
+                break
+            depth += 1
+            reached += len(next_frontier)
+            frontier = next_frontier
+        results.append((source,(depth,reached) if counts_only else dist))
+    return results
+
+
+class AsyncNeighbours:
+    def __init__(self,provider,concurrency=8,cache_size=1024):
+        self.provider = provider
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    async def load(self,node):
+        async with self.semaphore:
+            return list(await self.provider(node))
+
+    def prefetch(self,node):
+        if node in self.cache:
+            self.cache.move_to_end(node)
+            return self.cache[node]
+        task = asyncio.ensure_future(self.load(node))
+        task.add_done_callback(lambda task,node=node: self.evict_failed(node,task))
+        self.cache[node] = task
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return task
+
+    def evict_failed(self,node,task):
+        if (task.cancelled() or task.exception() is not None) and self.cache.get(node) is task:
+            del self.cache[node]
+
+    async def fetch(self,node):
+        return await self.prefetch(node)
+
+    def close(self):
+        for task in self.cache.values():
+            task.cancel()
+
+
+class FakeNeighbourProvider:
+    def __init__(self,graph,latency=0.01):
+        self.graph = graph
+        self.latency = latency
+        self.calls = 0
+
+    async def __call__(self,node):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return list(self.graph.graph.get(node,()))
+
+
+def neighbour_fetcher(neighbours,concurrency,cache_size):
+    if isinstance(neighbours,AsyncNeighbours):
+        return neighbours,False
+    return AsyncNeighbours(neighbours,concurrency,cache_size),True
+
+
+async def async_bfs(start,neighbours,concurrency=8,cache_size=1024,max_depth=None):
+    fetcher,owned = neighbour_fetcher(neighbours,concurrency,cache_size)
+    visited = {start}
+    frontier = [start]
+    depth = 0
+    yield start
+    try:
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for node_neighbours in await asyncio.gather(*(fetcher.fetch(node) for node in frontier)):
+                for niebour in node_neighbours:
+                    if niebour not in visited:
+                        visited.add(niebour)
+                        next_frontier.append(niebour)
+                        yield niebour
+            frontier = next_frontier
+    finally:
+        if owned:
+            fetcher.close()
+
+
+async def async_dfs(start,neighbours,concurrency=8,cache_size=1024):
+    fetcher,owned = neighbour_fetcher(neighbours,concurrency,cache_size)
+    visited = {start}
+    yield start
+    try:
+        stack = [iter(await fetcher.fetch(start))]
+        while stack:
+            for niegbour in stack[-1]:
+                if niegbour not in visited:
+                    visited.add(niegbour)
+                    yield niegbour
+                    node_neighbours = await fetcher.fetch(niegbour)
+                    for i in node_neighbours:
+                        if i not in visited:
+                            fetcher.prefetch(i)
+                    stack.append(iter(node_neighbours))
+                    break
+            else:
+                stack.pop()
+    finally:
+        if owned:
+            fetcher.close()
+
+
+async def collect(nodes):
+    return [node async for node in nodes]
+
+
+class CSRGraph(CSRBase):
+    def __init__(self,offsets,targets,labels,index=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.labels = labels
+        self.index = index
+        self.buffer = None
+
+    def neighbours(self,node):
+        i = self.node_id(node)
+        if i < 0:
+            return
+        for j in range(self.offsets[i],self.offsets[i+1]):
+            yield self.labels[self.targets[j]]
+
+    def dfs(self,start):
+        first = self.node_id(start)
+        if first < 0:
+            return []
+        offsets,targets = self.offsets,self.targets
+        visited = bytearray(len(self.labels))
+        order = []
+        stack = [first]
+        while stack:
+            node = stack.pop()
+            if visited[node]:
+                continue
+            visited[node] = 1
+            order.append(self.labels[node])
+            for j in range(offsets[node+1]-1,offsets[node]-1,-1):
+                if not visited[targets[j]]:
+                    stack.append(targets[j])
+        return order
+
+    def bfs(self,start):
+        first = self.node_id(start)
+        if first < 0:
+            return []
+        offsets,targets = self.offsets,self.targets
+        visited = bytearray(len(self.labels))
+        visited[first] = 1
+        queue = array('i',[first])
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for j in range(offsets[node],offsets[node+1]):
+                if not visited[targets[j]]:
+                    visited[targets[j]] = 1
+                    queue.append(targets[j])
+        return [self.labels[i] for i in queue]
+
+    def bfs_levels(self,start,target=None,max_depth=None):
+        n = len(self.labels)
+        dist = array('i',[-1]) * n
+        parent = array('i',[-1]) * n
+        first = self.node_id(start)
+        if first < 0:
+            return dist,parent
+        offsets,targets = self.offsets,self.targets
+        goal = self.node_id(target)
+        dist[first] = 0
+        frontier = array('i',[first])
+        depth = 0
+        while frontier and first != goal:
+            if max_depth is not None and depth >= max_depth:
+                break
+            depth += 1
+            next_frontier = array('i')
+            for node in frontier:
+                for i in targets[offsets[node]:offsets[node+1]]:
+                    if dist[i] < 0:
+                        dist[i] = depth
+                        parent[i] = node
+                        next_frontier.append(i)
+            if goal >= 0 and dist[goal] >= 0:
+                break
+            frontier = next_frontier
+        return dist,parent
+
+    def multi_source_bfs(self,sources,workers=None,counts_only=False,shard_size=64):
+        ids = [self.node_id(source) for source in sources]
+        ids = [i for i in ids if i >= 0]
+        n,m = len(self.labels),len(self.targets)
+        size = 8 * (n + 1) + 4 * m
+        block = shared_memory.SharedMemory(create=True,size=max(size,1))
+        try:
+            block.buf[:8 * (n + 1)] = memoryview(self.offsets).cast('B')
+            block.buf[8 * (n + 1):size] = memoryview(self.targets).cast('B')
+            with ProcessPoolExecutor(workers,initializer=attach_shared_graph,initargs=(block.name,n,m)) as executor:
+                shards = [executor.submit(bfs_shard,ids[i:i + shard_size],counts_only) for i in range(0,len(ids),shard_size)]
+                for shard in as_completed(shards):
+                    for source,result in shard.result():
+                        yield self.labels[source],result
+        finally:
+            block.close()
+            block.unlink()
+
+    def save(self,path):
+        return save_csr(path,self.offsets,self.targets,self.labels)
+
+    @classmethod
+    def load(cls,path):
+        loaded = load_csr(path)
+        if loaded is None:
+            return None
+        buffer,offsets,targets,weights,labels = loaded
+        graph = cls(offsets,targets,labels)
+        graph.buffer = buffer
+        return graph
 
 
 class Graph:
     def __init__(self):
         self.graph = {}
+        self.incoming = {}
+        self.ids = {}
+        self.labels = []
+        self.free = []
 
     def add_node(self,node):
         if node not in self.graph:
-            self.graph[node] = []
+            self.graph[node] = {}
+            self.incoming[node] = {}
+            if self.free:
+                self.ids[node] = self.free.pop()
+                self.labels[self.ids[node]] = node
+            else:
+                self.ids[node] = len(self.labels)
+                self.labels.append(node)
+
+    def node_id(self,node):
+        return self.ids.get(node,-1)
+
+    def label(self,i):
+        return self.labels[i]
+
+    def visited_set(self):
+        return VisitedSet(self.ids,len(self.labels))
 
     def add_edge(self,u,v,undirected=True):
         self.add_node(u)        
         self.add_node(v)
-        self.graph[u].append(v)
+        self._link(u,v)
         if undirected:
-            self.graph[v].append(u)
+            self._link(v,u)
+
+    def add_edges(self,edges,undirected=True):
+        graph = self.graph
+        for u,v in edges:
+            if u not in graph:
+                self.add_node(u)
+            if v not in graph:
+                self.add_node(v)
+            self._link(u,v)
+            if undirected:
+                self._link(v,u)
+
+    @classmethod
+    def from_edge_file(cls,path,undirected=True,binary=False,label=str,chunk_size=65536):
+        graph = cls()
+        if binary:
+            with open(path,'rb') as f:
+                while True:
+                    chunk = array('i')
+                    try:
+                        chunk.fromfile(f,2 * chunk_size)
+                    except EOFError:
+                        pass
+                    if not chunk:
+                        break
+                    graph.add_edges(zip(chunk[::2],chunk[1::2]),undirected)
+            return graph
+        with open(path) as f:
+            while True:
+                lines = list(islice(f,chunk_size))
+                if not lines:
+                    break
+                rows = (line.split() for line in lines if line.strip() and not line.startswith('#'))
+                graph.add_edges(((label(row[0]),label(row[1])) for row in rows),undirected)
+        return graph
+
+    def _link(self,u,v):
+        self.graph[u][v] = self.graph[u].get(v,0) + 1
+        self.incoming[v][u] = self.incoming[v].get(u,0) + 1
+
+    def _unlink(self,u,v):
+        if u not in self.graph or v not in self.graph[u]:
+            return
+        self.graph[u][v] -= 1
+        self.incoming[v][u] -= 1
+        if not self.graph[u][v]:
+            del self.graph[u][v]
+            del self.incoming[v][u]
 
     def remove_edge(self,u,v,undeirected=True):
-        if u in self.graph and v in self.graph[u]:
-            self.graph[u].remove(v)
-        if undeirected and v in self.graph and u in self.graph[v]:
-            self.graph[v].remove(u)
+        self._unlink(u,v)
+        if undeirected:
+            self._unlink(v,u)
 
 
     def remove_node(self,node):
-        if node in self.graph:
-            del self.graph[node]
-        for i in self.graph:
-            if node in self.graph[i]:
-                self.graph[i].remove(node)
+        if node not in self.graph:
+            return
+        for i in self.incoming.pop(node):
+            if i != node:
+                del self.graph[i][node]
+        for i in self.graph.pop(node):
+            if i != node:
+                del self.incoming[i][node]
+        i = self.ids.pop(node)
+        self.labels[i] = None
+        self.free.append(i)
 
     def dfs(self,start,visited=None):
         if visited is None:
-            visited = set()
+            visited = self.visited_set()
         if not start  or start in visited:
             return
+        for node in self.dfs_iter(start,visited):
+            print(node,end=' ')
+
+    def dfs_events(self,start,visited=None,directed=False):
+        if visited is None:
+            visited = self.visited_set()
+        if start not in self.graph or start in visited:
+            return
         visited.add(start)
-        print(start,end=' ')
-        for niegbour in self.graph[start]:
-            if niegbour not in visited:
-                self.dfs(niegbour,visited)
+        on_stack = self.visited_set()
+        on_stack.add(start)
+        yield 'pre',start
+        stack = [(start,iter(self.graph[start]),None)]
+        while stack:
+            node,niegbours,parent = stack[-1]
+            for niegbour in niegbours:
+                if niegbour not in visited:
+                    visited.add(niegbour)
+                    on_stack.add(niegbour)
+                    yield 'pre',niegbour
+                    stack.append((niegbour,iter(self.graph[niegbour]),node))
+                    break
+                if niegbour == parent and not directed and self.graph[node][niegbour] == 1:
+                    continue
+                if niegbour in on_stack:
+                    yield 'back',(node,niegbour)
+            else:
+                stack.pop()
+                on_stack.discard(node)
+                yield 'post',node
+
+    def dfs_iter(self,start,visited=None,directed=False):
+        for event,node in self.dfs_events(start,visited,directed):
+            if event == 'pre':
+                yield node
 
     def bfs(self,start):
         if start not in self.graph:
             print('node not found')
             return
-        visited = set([start])
-        queue  = [start]
+        visited = self.visited_set()
+        visited.add(start)
+        queue  = deque([start])
 
         while queue:
-            node = queue.pop(0) 
+            node = queue.popleft()
             print(node,end='')
             for niebour in self.graph[node]:
                 if niebour not in visited:
                     visited.add(niebour)
                     queue.append(niebour)
 
+    def compact(self):
+        if self.free:
+            self.labels = [node for node in self.labels if node is not None]
+            self.ids = {node:i for i,node in enumerate(self.labels)}
+            self.free = []
+
+    def freeze(self):
+        self.compact()
+        ids = self.ids
+        offsets = array('q',[0])
+        targets = array('i')
+        for node in self.labels:
+            targets.extend(ids[i] for i in self.graph[node])
+            offsets.append(len(targets))
+        return CSRGraph(offsets,targets,list(self.labels),dict(ids))
+
+    def multi_source_bfs(self,sources,workers=None,counts_only=False,shard_size=64):
+        return self.freeze().multi_source_bfs(sources,workers,counts_only,shard_size)
+
+    def bfs_levels(self,start,target=None,max_depth=None):
+        if start not in self.graph:
+            return {},{}
+        dist = {start:0}
+        parent = {start:None}
+        frontier = [start]
+        depth = 0
+        while frontier and start != target:
+            if max_depth is not None and depth >= max_depth:
+                break
+            depth += 1
+            next_frontier = []
+            for node in frontier:
+                for niebour in self.graph[node]:
+                    if niebour not in dist:
+                        dist[niebour] = depth
+                        parent[niebour] = node
+                        next_frontier.append(niebour)
+            if target in dist:
+                break
+            frontier = next_frontier
+        return dist,parent
+
     def print_graph(self):
         for node in self.graph:
-            print(node,'-->',self.graph[node])
+            print(node,'-->',list(self.graph[node]))
+
+
+if __name__ == '__main__':
+    g = Graph()
+    g.add_edge(1, 2)
+    g.add_edge(1, 3)
+    g.add_edge(2, 4)
+    g.add_edge(3, 5)
+    g.add_edge(5, 6)
+
+    print("Graph:")
+    g.print_graph()
+
+    print("\nDFS from node 1:")
+    g.dfs(1)
+
+    print("\nBFS from node 1:")
+    g.bfs(1)
+
+    g.remove_edge(1, 2)
+    print("\nGraph after removing edge 1-2:")
+    g.print_graph()
+
+    g.remove_node(5)
+    print("\nGraph after removing node 5:")
+    g.print_graph()
 
+    csr = g.freeze()
+    print("\nCSR offsets:",list(csr.offsets))
+    print("CSR targets:",list(csr.targets))
+    print("CSR DFS from node 1:",csr.dfs(1))
+    print("CSR BFS from node 1:",csr.bfs(1))
+    print("Neighbours of 3:",list(csr.neighbours(3)))
 
-g = Graph()
-g.add_edge(1, 2)
-g.add_edge(1, 3)
-g.add_edge(2, 4)
-g.add_edge(3, 5)
-g.add_edge(5, 6)
+    print("CSR BFS levels from node 1:",list(csr.bfs_levels(1)[0]))
+    print("BFS levels from node 1:",g.bfs_levels(1))
+    print("DFS events from node 1:",list(g.dfs_events(1)))
 
-print("Graph:")
-g.print_graph()
+    g.add_edge(3,4)
+    g.add_edge(3,4)
+    print("Edge counts from 3:",g.graph[3])
+    g.remove_edge(3,4)
+    print("Edge counts from 3 after one removal:",g.graph[3])
+    print("Incoming edges of 4:",g.incoming[4])
 
-print("\nDFS from node 1:")
-g.dfs(1)
+    edge_file = os.path.join(tempfile.gettempdir(),'edges.txt')
+    with open(edge_file,'w') as f:
+        f.write('10 11\n11 12\n12 13\n10 13\n')
+    bulk = Graph.from_edge_file(edge_file,label=int)
+    bulk.add_edges([(13,14),(14,15)])
+    csr_file = os.path.join(tempfile.gettempdir(),'graph.csr')
+    bulk.freeze().save(csr_file)
+    loaded = CSRGraph.load(csr_file)
+    print("Loaded labels:",list(loaded.labels))
+    print("BFS on mmap-ed graph from 10:",loaded.bfs(10))
+    print("Id of node 12:",bulk.node_id(12),"label of id 2:",bulk.label(2))
+    provider = FakeNeighbourProvider(bulk,latency=0.001)
+    print("Async BFS from 10:",asyncio.run(collect(async_bfs(10,provider))))
+    print("Async DFS from 10:",asyncio.run(collect(async_dfs(10,provider))))
 
-print("\nBFS from node 1:")
-g.bfs(1)
+    async def cached_walks(provider):
+        fetcher = AsyncNeighbours(provider)
+        return await collect(async_bfs(10,fetcher)),await collect(async_dfs(10,fetcher))
 
-g.remove_edge(1, 2)
-print("\nGraph after removing edge 1-2:")
-g.print_graph()
+    provider = FakeNeighbourProvider(bulk,latency=0.001)
+    print("BFS then DFS sharing one cache:",asyncio.run(cached_walks(provider)),"fetches:",provider.calls)
 
-g.remove_node(5)
-print("\nGraph after removing node 5:")
-g.print_graph()
\ No newline at end of file
+    for source,(eccentricity,reachable) in sorted(bulk.multi_source_bfs(bulk.graph,workers=2,counts_only=True)):
+        print("Source",source,"eccentricity",eccentricity,"reaches",reachable)
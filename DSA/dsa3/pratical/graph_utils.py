@@ -0,0 +1,67 @@
+class VisitedSet:
+    def __init__(self,ids,size):
+        self.ids = ids
+        self.bits = bytearray((size + 7) // 8)
+
+    def add(self,node):
+        i = self.ids[node]
+        self.bits[i >> 3] |= 1 << (i & 7)
+
+    def discard(self,node):
+        i = self.ids.get(node)
+        if i is not None:
+            self.bits[i >> 3] &= ~(1 << (i & 7)) & 255
+
+    def __contains__(self,node):
+        i = self.ids.get(node)
+        return i is not None and bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+
+def intern(graph):
+    return {node:i for i,node in enumerate(graph)}
+
+
+def visited_set(ids=None):
+    if ids is None:
+        return set()
+    return VisitedSet(ids,len(ids))
+
+
+def strongly_connected(adj):
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    for root in adj:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root,iter(adj[root]))]
+        while work:
+            node,neighbours = work[-1]
+            for i in neighbours:
+                if i not in index:
+                    index[i] = low[i] = len(index)
+                    stack.append(i)
+                    on_stack.add(i)
+                    work.append((i,iter(adj[i])))
+                    break
+                if i in on_stack:
+                    low[node] = min(low[node],index[i])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]],low[node])
+                if low[node] == index[node]:
+                    component = set()
+                    while True:
+                        i = stack.pop()
+                        on_stack.discard(i)
+                        component.add(i)
+                        if i == node:
+                            break
+                    components.append(component)
+    return components
@@ -1,27 +1,164 @@
+from array import array
 
 
 class Node:
     def __init__(self,data):
         self.data = data
         self.children = []
+        self.parent = None
+        self.count = None
+        self.height = None
 
 
 class GenneralTree:
 
-    def __init__(self,rootdata):
+    def __init__(self,rootdata,indexed=False):
         self.root = Node(rootdata)
+        self.index = None
+        self.version = 0
+        self.tour_version = -1
+        if indexed:
+            self.root.children = {}
+            self.index = {rootdata:{self.root:None}}
 
     def add_child(self,parent,data):
         new_child = Node(data)
-        parent.children.append(new_child)
+        new_child.parent = parent
+        self.version += 1
+        if self.index is None:
+            parent.children.append(new_child)
+            return new_child
+        new_child.children = {}
+        parent.children[new_child] = None
+        self.index.setdefault(data,{})[new_child] = None
+        self.invalidate(parent)
         return new_child
 
+    def invalidate(self,node):
+        while node and node.count is not None:
+            node.count = node.height = None
+            node = node.parent
+
+    def is_under(self,node,ancestor):
+        while node:
+            if node is ancestor:
+                return True
+            node = node.parent
+        return False
+
+    def _lookup(self,node,value,strict=False):
+        found = [i for i in self.index.get(value,()) if not (strict and i is node) and self.is_under(i,node)]
+        if len(found) > 1:
+            self.build_tour()
+            return min(found,key=self.tour[0].__getitem__)
+        return found[0] if found else None
+
+    def _cache(self,node):
+        stack = [(node,False)]
+        while stack:
+            current,done = stack.pop()
+            if current.count is not None:
+                continue
+            if done:
+                current.count = 1 + sum(i.count for i in current.children)
+                current.height = 1 + max((i.height for i in current.children),default=0)
+                continue
+            stack.append((current,True))
+            for i in current.children:
+                stack.append((i,False))
+
+    def move_subtree(self,node,new_parent):
+        if node.parent is None or not self.is_under(node,self.root) or not self.is_under(new_parent,self.root):
+            print('node is not in the tree')
+            return False
+        if self.is_under(new_parent,node):
+            print('cannot move a node under itself')
+            return False
+        old_parent = node.parent
+        self.version += 1
+        if self.index is None:
+            old_parent.children.remove(node)
+            new_parent.children.append(node)
+        else:
+            del old_parent.children[node]
+            new_parent.children[node] = None
+            self.invalidate(old_parent)
+            self.invalidate(new_parent)
+        node.parent = new_parent
+        return True
+
     def print_tree(self,node,level=0):
         print('  ' * level ,str(node.data))
         for node in node.children:
             self.print_tree(node,level + 1)
 
+    def build_tour(self):
+        if self.tour_version == self.version:
+            return
+        ids = {}
+        nodes = []
+        tout = array('i')
+        depth = array('i')
+        parent = array('i')
+        stack = [(self.root,0,-1)]
+        while stack:
+            node,level,up = stack.pop()
+            if node is None:
+                tout[level] = len(ids)
+                continue
+            i = len(ids)
+            ids[node] = i
+            nodes.append(node)
+            tout.append(i + 1)
+            depth.append(level)
+            parent.append(up if up >= 0 else i)
+            stack.append((None,i,-1))
+            for child in reversed(list(node.children)):
+                stack.append((child,level + 1,i))
+        jumps = [parent]
+        for k in range(1,max(1,max(depth,default=0)).bit_length()):
+            previous = jumps[-1]
+            jumps.append(array('i',(previous[previous[i]] for i in range(len(ids)))))
+        self.tour = (ids,nodes,tout,depth,jumps)
+        self.tour_version = self.version
+
+    def is_ancestor(self,ancestor,node):
+        self.build_tour()
+        ids,nodes,tout,depth,jumps = self.tour
+        if ancestor not in ids or node not in ids:
+            return False
+        a,b = ids[ancestor],ids[node]
+        return a <= b < tout[a]
+
+    def subtree_size(self,node):
+        self.build_tour()
+        ids,nodes,tout,depth,jumps = self.tour
+        if node not in ids:
+            return 0
+        return tout[ids[node]] - ids[node]
+
+    def lca(self,a,b):
+        self.build_tour()
+        ids,nodes,tout,depth,jumps = self.tour
+        if a not in ids or b not in ids:
+            return None
+        a,b = ids[a],ids[b]
+        if depth[a] < depth[b]:
+            a,b = b,a
+        diff = depth[a] - depth[b]
+        for k in range(len(jumps)):
+            if diff >> k & 1:
+                a = jumps[k][a]
+        if a == b:
+            return nodes[a]
+        for k in range(len(jumps)-1,-1,-1):
+            if jumps[k][a] != jumps[k][b]:
+                a,b = jumps[k][a],jumps[k][b]
+        return nodes[jumps[0][a]]
+
     def find_node(self,node,value):
+        if self.index is not None:
+            return self._lookup(node,value)
         if node.data == value:
             return node
         for i in node.children:
@@ -33,6 +170,9 @@ class GenneralTree:
     def count_node(self,node):
         if node is None:
             return 0
+        if self.index is not None:
+            self._cache(node)
+            return node.count
         total = 1
         for i in node.children:
             total+= self.count_node(i)
@@ -41,6 +181,9 @@ class GenneralTree:
     def height_tree(self,node):
         if node is None :
             return 0  
+        if self.index is not None:
+            self._cache(node)
+            return node.height
         if not node.children :
             return 1
         return 1 + max(self.height_tree(i) for i in node.children)
@@ -48,10 +191,29 @@ class GenneralTree:
     def delete_node(self,parent,value_to_delete):
         if  not parent:
             return None
+        if self.index is not None:
+            child = self._lookup(parent,value_to_delete,strict=True)
+            if not child:
+                return False
+            del child.parent.children[child]
+            self.version += 1
+            self.invalidate(child.parent)
+            child.parent = None
+            stack = [child]
+            while stack:
+                current = stack.pop()
+                same = self.index[current.data]
+                del same[current]
+                if not same:
+                    del self.index[current.data]
+                stack.extend(current.children)
+            return True
         
         for i,child in enumerate(parent.children):
             if child.data == value_to_delete:
                 del parent.children[i]
+                child.parent = None
+                self.version += 1
                 return True
             
             if self.delete_node(child,value_to_delete):
@@ -83,3 +245,21 @@ print('True' if tree.find_node(tree.root,'Accountant') else 'False')
 
 print(tree.count_node(tree.root))
 print(tree.height_tree(tree.root))
+
+org = GenneralTree("CEO",indexed=True)
+cto = org.add_child(org.root,"CTO")
+cfo = org.add_child(org.root,"CFO")
+dev = org.add_child(cto,"Dev Manager")
+org.add_child(dev,"Developer 1")
+org.add_child(cfo,"Accountant")
+print("\nIndexed find 'Developer 1':",org.find_node(org.root,"Developer 1").data)
+org.move_subtree(dev,cfo)
+print("After moving Dev Manager under CFO:")
+org.print_tree(org.root)
+print(org.count_node(org.root),org.height_tree(org.root))
+org.delete_node(org.root,"Dev Manager")
+print(org.count_node(org.root),org.height_tree(org.root))
+acc = org.find_node(org.root,"Accountant")
+print("Is CFO above Accountant?",org.is_ancestor(cfo,acc))
+print("Descendants of CEO:",org.subtree_size(org.root) - 1)
+print("Lowest common manager of Accountant and CTO:",org.lca(acc,cto).data)
@@ -1,3 +1,5 @@
+from collections import deque
+from itertools import islice
 
 
 class Node:
@@ -9,37 +11,56 @@ class Tree:
     def __init__(self,size):
         self.root = None
         self.size = size
+        self.open = deque()
 
     def insert(self,data):
         new_node = Node(data)
         if self.root is None:
             self.root = new_node
+        elif not self.open:
             return
-        queue = [self.root]
-        while queue:
-            i=0
-            current = queue.pop(0)
-            if len(current.children) < self.size:
-                current.children.append(new_node)
+        else:
+            current = self.open[0]
+            current.children.append(new_node)
+            if len(current.children) >= self.size:
+                self.open.popleft()
+        if self.size > 0:
+            self.open.append(new_node)
+
+    def extend(self,items):
+        items = iter(items)
+        if self.root is None:
+            for data in items:
+                self.insert(data)
+                break
+        while self.open:
+            current = self.open[0]
+            batch = [Node(data) for data in islice(items,self.size - len(current.children))]
+            if not batch:
                 return
-            for child in current.children:
-                queue.append(child)
-            
-
+            current.children.extend(batch)
+            self.open.extend(batch)
+            if len(current.children) >= self.size:
+                self.open.popleft()
+
+    def iter_levels(self):
+        level = [self.root] if self.root else []
+        while level:
+            yield [node.data for node in level]
+            level = [child for node in level for child in node.children]
                  
     def printtree(self):
         if not self.root:
             return
-        queue = [self.root]
+        queue = deque([self.root])
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             print(f"{current.data} -> ", end="")
             if current.children:
                 print(" ".join(str(child.data) for child in current.children))
             else:
                 print("")  
-            for child in current.children:
-                queue.append(child)
+            queue.extend(current.children)
 
 t= Tree(3)
 t.insert(10)
@@ -50,6 +71,11 @@ t.insert(50)
 
 t.printtree()
 
+big = Tree(2)
+big.extend(range(1,11))
+for level in big.iter_levels():
+    print(level)
+
 
 
 
@@ -1,29 +1,304 @@
+import heapq
+import os
+import struct
+import tempfile
+from array import array
+from itertools import chain,count,islice
+
+from binary_format import value_typecode
+from csr_format import CSRBase,load_csr,save_csr
+
+EDGE = struct.Struct('<iid')
+
+
+def number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+class CSRGraph(CSRBase):
+    def __init__(self,offsets,targets,weights,labels,index=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.labels = labels
+        self.index = index
+        self.buffer = None
+
+    def neighbours(self,node):
+        i = self.node_id(node)
+        if i < 0:
+            return
+        for j in range(self.offsets[i],self.offsets[i+1]):
+            yield self.labels[self.targets[j]],self.weights[j]
+
+    def save(self,path):
+        return save_csr(path,self.offsets,self.targets,self.labels,self.weights)
+
+    @classmethod
+    def load(cls,path):
+        loaded = load_csr(path)
+        if loaded is None:
+            return None
+        buffer,offsets,targets,weights,labels = loaded
+        if weights is None:
+            print('not a weighted CSR graph file')
+            return None
+        graph = cls(offsets,targets,weights,labels)
+        graph.buffer = buffer
+        return graph
+
+
 class Graph:
     def __init__(self):
         self.graph = {}
+        self.reverse = {}
         
     def add_node(self,node):
         if node not in self.graph:
             self.graph[node] = []
+            self.reverse[node] = []
         
     def add_edge(self,u,v,weight=1,undirected = True):
         self.add_node(u)
         self.add_node(v)
         self.graph[u].append((v,weight))
+        self.reverse[v].append((u,weight))
         if  undirected:
             self.graph[v].append((u,weight))
+            self.reverse[u].append((v,weight))
+
+
+    def add_edges(self,edges,undirected = True):
+        graph,reverse = self.graph,self.reverse
+        for u,v,*weight in edges:
+            weight = weight[0] if weight else 1
+            if u not in graph:
+                self.add_node(u)
+            if v not in graph:
+                self.add_node(v)
+            graph[u].append((v,weight))
+            reverse[v].append((u,weight))
+            if undirected:
+                graph[v].append((u,weight))
+                reverse[u].append((v,weight))
+
+    @classmethod
+    def from_edge_file(cls,path,undirected = True,binary = False,label = str,chunk_size = 65536):
+        graph = cls()
+        if binary:
+            with open(path,'rb') as f:
+                while True:
+                    chunk = f.read(EDGE.size * chunk_size)
+                    if not chunk:
+                        break
+                    graph.add_edges(EDGE.iter_unpack(chunk[:len(chunk) - len(chunk) % EDGE.size]),undirected)
+            return graph
+        with open(path) as f:
+            while True:
+                lines = list(islice(f,chunk_size))
+                if not lines:
+                    break
+                rows = (line.split() for line in lines if line.strip() and not line.startswith('#'))
+                graph.add_edges(((label(row[0]),label(row[1]),number(row[2]) if len(row) > 2 else 1) for row in rows),undirected)
+        return graph
+
+    def freeze(self):
+        labels = list(self.graph)
+        index = {label:i for i,label in enumerate(labels)}
+        offsets = array('q',[0])
+        targets = array('i')
+        weights = []
+        for node in labels:
+            for v,w in self.graph[node]:
+                targets.append(index[v])
+                weights.append(w)
+            offsets.append(len(targets))
+        typecode = value_typecode(weights)
+        if typecode in ('q','d'):
+            weights = array(typecode,weights)
+        return CSRGraph(offsets,targets,weights,labels,index)
            
     def remove_edge(self,u,v,undericted = True):
-        if u in self.graph :
+        if u in self.graph and v in self.graph:
             self.graph[u] = [(node,w) for (node,w) in self.graph[u] if node != v]
-        if undericted and  v in self.graph :
+            self.reverse[v] = [(node,w) for (node,w) in self.reverse[v] if node != u]
+        if undericted and  v in self.graph and u in self.graph:
             self.graph[v]= [(node,w) for (node,w) in self.graph[v] if node != u]
+            self.reverse[u] = [(node,w) for (node,w) in self.reverse[u] if node != v]
             
     def remove_node(self,node):
-        if node in self.graph:
-            del self.graph[node]
-        for i in self.graph:
+        if node not in self.graph:
+            return
+        for i in set(n for (n,w) in self.reverse.pop(node)):
             self.graph[i] = [(n,w) for (n,w) in self.graph[i] if n != node]
+        for i in set(n for (n,w) in self.graph.pop(node)):
+            if i != node:
+                self.reverse[i] = [(n,w) for (n,w) in self.reverse[i] if n != node]
+
+    def _search(self,adjacency,source,target=None,max_dist=None,heuristic=None):
+        dist = {source:0}
+        prev = {source:None}
+        done = set()
+        tie = count()
+        heap = [(heuristic(source) if heuristic else 0,next(tie),source)]
+        while heap:
+            _,_,node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            if node == target:
+                dist = {i:d for i,d in dist.items() if i in done}
+                prev = {i:p for i,p in prev.items() if i in done}
+                break
+            for v,w in adjacency[node]:
+                d = dist[node] + w
+                if max_dist is not None and d > max_dist:
+                    continue
+                if v not in dist or d < dist[v]:
+                    dist[v] = d
+                    prev[v] = node
+                    key = d + heuristic(v) if heuristic else d
+                    heapq.heappush(heap,(key,next(tie),v))
+        return dist,prev
+
+    def dijkstra(self,source,target=None,max_dist=None):
+        if source not in self.graph:
+            print('node not found')
+            return {},{}
+        return self._search(self.graph,source,target,max_dist)
+
+    def astar(self,source,target,heuristic=None,max_dist=None):
+        if source not in self.graph:
+            print('node not found')
+            return {},{}
+        if heuristic is None:
+            heuristic = lambda node,target: 0
+        return self._search(self.graph,source,target,max_dist,lambda node: heuristic(node,target))
+
+    def bidirectional_dijkstra(self,source,target,max_dist=None):
+        if source not in self.graph or target not in self.graph:
+            print('node not found')
+            return {},{}
+        if source == target:
+            return {source:0},{source:None}
+        dist = [{source:0},{target:0}]
+        prev = [{source:None},{target:None}]
+        done = [set(),set()]
+        heaps = [[(0,0,source)],[(0,0,target)]]
+        adjacency = [self.graph,self.reverse]
+        tie = count(1)
+        best = float('inf')
+        meet = None
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            d,_,node = heapq.heappop(heaps[side])
+            if node in done[side]:
+                continue
+            done[side].add(node)
+            for v,w in adjacency[side][node]:
+                nd = d + w
+                if max_dist is not None and nd > max_dist:
+                    continue
+                if v not in dist[side] or nd < dist[side][v]:
+                    dist[side][v] = nd
+                    prev[side][v] = node
+                    heapq.heappush(heaps[side],(nd,next(tie),v))
+                if v in dist[1-side] and nd + dist[1-side][v] < best:
+                    best = nd + dist[1-side][v]
+                    meet = v
+        if meet is None or (max_dist is not None and best > max_dist):
+            return {},{}
+        path = [meet]
+        while prev[0][path[0]] is not None:
+            path.insert(0,prev[0][path[0]])
+        while prev[1][path[-1]] is not None:
+            path.append(prev[1][path[-1]])
+        path_dist = {source:0}
+        path_prev = {source:None}
+        for a,b in zip(path,path[1:]):
+            path_dist[b] = path_dist[a] + min(w for (n,w) in self.graph[a] if n == b)
+            path_prev[b] = a
+        return path_dist,path_prev
+
+    def kruskal(self):
+        labels = list(self.graph)
+        ids = {node:i for i,node in enumerate(labels)}
+        us = array('i')
+        vs = array('i')
+        weights = []
+        for u in labels:
+            for v,w in self.graph[u]:
+                us.append(ids[u])
+                vs.append(ids[v])
+                weights.append(w)
+        typecode = value_typecode(weights)
+        if typecode in ('q','d'):
+            weights = array(typecode,weights)
+        parent = array('i',range(len(labels)))
+        rank = bytearray(len(labels))
+
+        def find(i):
+            root = i
+            while parent[root] != root:
+                root = parent[root]
+            while parent[i] != root:
+                parent[i],i = root,parent[i]
+            return root
+
+        tree = []
+        total = 0
+        for e in sorted(range(len(weights)),key=weights.__getitem__):
+            a,b = find(us[e]),find(vs[e])
+            if a == b:
+                continue
+            if rank[a] < rank[b]:
+                a,b = b,a
+            parent[b] = a
+            if rank[a] == rank[b]:
+                rank[a] += 1
+            tree.append((labels[us[e]],labels[vs[e]],weights[e]))
+            total += weights[e]
+            if len(tree) == len(labels) - 1:
+                break
+        return tree,total
+
+    def prim(self,start=None):
+        roots = [start] if start is not None else list(self.graph)
+        visited = set()
+        tree = []
+        total = 0
+        tie = count()
+        for root in roots:
+            if root in visited or root not in self.graph:
+                continue
+            visited.add(root)
+            heap = [(w,next(tie),root,v) for v,w in chain(self.graph[root],self.reverse[root])]
+            heapq.heapify(heap)
+            while heap:
+                w,_,u,v = heapq.heappop(heap)
+                if v in visited:
+                    continue
+                visited.add(v)
+                tree.append((u,v,w))
+                total += w
+                for i,wi in chain(self.graph[v],self.reverse[v]):
+                    if i not in visited:
+                        heapq.heappush(heap,(wi,next(tie),v,i))
+        return tree,total
+
+    def path(self,prev,target):
+        if target not in prev:
+            return []
+        result = []
+        while target is not None:
+            result.append(target)
+            target = prev[target]
+        return result[::-1]
                 
     def show_graph(self):
         for node in self.graph:
@@ -37,3 +312,26 @@ g.add_edge('c','B',4)
 g.remove_node('D')
 g.remove_edge('B',"c")
 g.show_graph()
+
+g.add_edge('c','D',2)
+g.add_edge('D','E',3)
+g.add_edge('B','E',1)
+dist,prev = g.dijkstra('A')
+print("Dijkstra from A:",dist)
+print("Path A->E:",g.path(prev,'E'))
+dist,prev = g.bidirectional_dijkstra('A','E')
+print("Bidirectional A->E:",dist['E'],g.path(prev,'E'))
+dist,prev = g.astar('A','E',lambda node,target: 0)
+print("A* A->E:",dist['E'],g.path(prev,'E'))
+print("Within distance 3 of A:",g.dijkstra('A',max_dist=3)[0])
+
+mst = Graph()
+for u,v,w in [('A','B',4),('A','C',1),('B','C',2),('B','D',5),('C','D',8),('D','E',3)]:
+    mst.add_edge(u,v,w)
+print("Kruskal MST:",mst.kruskal())
+print("Prim MST:",mst.prim())
+
+csr_file = os.path.join(tempfile.gettempdir(),'weighted_graph.csr')
+mst.freeze().save(csr_file)
+loaded = CSRGraph.load(csr_file)
+print("Neighbours of B from mmap-ed graph:",list(loaded.neighbours('B')))